@@ -1,172 +1,168 @@
-from nltk import download
-from nltk.tokenize import sent_tokenize, word_tokenize
-
-from Markov import TrigramModel
-
-
-# Ensure the necessary tools for tokenization are available
-print("Checking requirements...")
-download("punkt")
-print()
-
-
-# Utility constants
-
-# The number of words to generate in the output
-_WORD_COUNT = 2000
-
-# The maximum number of words between random words
-# Setting this to 15 seems to avoid long strings of the same sentence
-# repeating, but this also causes some long sentences.
-_REFRESH_LIMIT = 15
-
-# Text files to train the model on and how many lines to skip at the start of
-# each file
-_FILES = [("houn.txt", 8), ("sign.txt", 8), ("stud.txt", 8), ("vall.txt", 8)]
-
-# Based on the example linked in the instructions document
-# (https://www.geeksforgeeks.org/removing-punctuations-given-string/), but
-# periods are excluded so that they are counted as words.
-_PUNCTUATION = "!()-[]{};:''``\"\\,<>/?@#$%^&*_~"
-
-# Words to always capitalize
-_CAPITALIZE = [
-    "i", "mr.", "dr.", "sherlock", "holmes", "john", "watson", "moriarty"
-]
-
-# The output file name
-_OUTPUT_FILE = "Readme.txt"
-
-
-# Input parsing
-
-# Find the index of the nth instance of a substring in a given string, or -1 if
-# the substring does not have n instances (or if n < 1).
-def _nth_index(string, substring, n):
-    ind = -1
-    for i in range(n):
-        ind = string.find(substring, ind + 1)
-        if ind == -1:
-            return -1 # Signal no more instances
-    
-    return ind
-
-# Read the specified input file and return the remainder after skipping the
-# specified number of lines.
-def _read_file(file_and_skip):
-    try:
-        with open(file_and_skip[0], "r") as input:
-            content = input.read()
-    except OSError:
-        print(f'The contents of "{file_and_skip[0]}" could not be read.')
-        return None
-    
-    # Skip the specified number of initial lines and return the result.
-    return content[_nth_index(content, '\n', file_and_skip[1]) + 1:]
-
-# Correct for the punkt word tokenizer's tendency to leave a single quote at
-# the start of a word after removing other punctuation.
-# This leaves "'s" as-is.
-def _remove_starting_single_quote(word):
-    return word[1:] if word[0] == "'" and word[1] != "s" else word
-
-def _tokenize(words):
-    # Split input into sentences.
-    # sent_tokenize successfully treats some periods such as the period in "Mr." as
-    # not the end of a sentence, but other cases such as abbreviations (e.g.,
-    # "C.C.H.") cause a sentence to end incorrectly. For simplicity, this is not
-    # corrected here.
-    sentences = sent_tokenize(words)
-
-    # Split sentences into single list of words, excluding punctuation.
-    # Words in sentences could be treated differently here for a more accurate
-    # language model, but sentence tokenization currently only helps identify
-    # periods at the ends of sentences.
-    return [_remove_starting_single_quote(word.lower())
-        for wordList in [word_tokenize(sent) for sent in sentences] # Split each sentence
-        for word in wordList # Extract word from its sentence's list
-        if word not in _PUNCTUATION # Exclude punctuation
-    ]
-
-
-# Model training and output generation
-
-# Split the provided text into words and feed the words to the model.
-def _consume_text(model, text):
-    words = _tokenize(text)
-
-    model.start_input(words[0], words[1])
-    for i in range(2, len(words)):
-        model.consume_word(words[i])
-    model.end_input()
-
-# Parse the provided input file into words and train the provided model.
-def _build_model():
-    model = TrigramModel()
-
-    for file_and_skip in _FILES:
-        content = _read_file(file_and_skip)
-        if content is None:
-            return None # Signal failure. Error message is already printed.
-        
-        _consume_text(model, content)
-
-    model.finish()
-    return model
-
-# Return a string of the specified number of words based on the model.
-# After the specified number of words, continue until a period is generated.
-def _generate_words(model, word_count, refresh_limit):
-    generator = model.output_generator(refresh_limit)
-    words = []
-
-    count = 0
-    capitalize = True
-    new_word = None
-    while count < word_count or new_word != ".":
-        new_word = generator.generate_word()
-
-        # If a period is produced, add it to the end of the previous word
-        # without a space, capitalize the next word, and do not increment the
-        # counter (do not count periods toward the word count).
-        if new_word == ".":
-            if count == 0: # Do not start with a period
-                continue
-
-            words.append(words.pop() + ".")
-            capitalize = True
-        else:
-            words.append(
-                new_word.capitalize() if capitalize or new_word in _CAPITALIZE \
-                else new_word
-            )
-            capitalize = False
-            count += 1
-
-    # Separate the words with spaces and return a string.
-    return " ".join(words)
-
-
-# File printing
-
-def _print_file(text):
-    try:
-        with open(_OUTPUT_FILE, "w") as file:
-            file.write(text)
-    except OSError:
-        print(
-            f'The results could not be written to "{_OUTPUT_FILE}". Make sure '
-            'the program is run with sufficient permissions.'
-        )
-
-
-def main():
-    model = _build_model()
-    if model is None:
-        return -1 # Failure
-
-    # Generate output
-    _print_file(_generate_words(model, _WORD_COUNT, _REFRESH_LIMIT))
-
-if __name__ == "__main__":
-    main()
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from Markov import TrigramModel
+
+
+# Utility constants
+
+# The number of words to generate in the output
+_WORD_COUNT = 2000
+
+# The maximum number of words between random words
+# Setting this to 15 seems to avoid long strings of the same sentence
+# repeating, but this also causes some long sentences.
+_REFRESH_LIMIT = 15
+
+# Text files to train the model on and how many lines to skip at the start of
+# each file
+_FILES = [("houn.txt", 8), ("sign.txt", 8), ("stud.txt", 8), ("vall.txt", 8)]
+
+# One token is a run of letters/digits with optional internal hyphens or
+# apostrophes (so "to-morrow", "don't", and possessives like "holmes'" stay
+# whole, while "--" dashes split words), or a lone period so that periods are
+# counted as words. Everything else is punctuation and is simply never
+# matched, so no separate punctuation filter is needed.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*'?|\.")
+
+# Words to always capitalize.
+# A frozenset so the per-word membership test in _generate_words is a hash
+# probe rather than a list scan.
+_CAPITALIZE = frozenset({
+    "i", "mr", "dr", "sherlock", "holmes", "john", "watson", "moriarty"
+})
+
+# The output file name
+_OUTPUT_FILE = "Readme.txt"
+
+
+# Input parsing
+
+# Read the specified input file and return the remainder after skipping the
+# specified number of lines.
+def _read_file(file_and_skip):
+    try:
+        with open(file_and_skip[0], "r") as input:
+            content = input.read()
+    except OSError:
+        print(f'The contents of "{file_and_skip[0]}" could not be read.')
+        return None
+
+    # Skip the specified number of initial lines and return the result.
+    # A single maxsplit-limited split scans the content once in C; if the
+    # file has fewer lines than the skip count, the whole content is kept
+    # (as before).
+    skip = file_and_skip[1]
+    parts = content.split('\n', skip)
+
+    return parts[skip] if len(parts) > skip else content
+
+# Split input into a single list of words, excluding punctuation.
+#
+# A single compiled-regex pass over the lowercased text replaces the NLTK
+# punkt pipeline, which applied many Python-level tokenization rules per
+# sentence. One consequence is that abbreviations such as "mr." are now split
+# into a word and a period rather than kept whole.
+def _tokenize(words):
+    return _TOKEN_PATTERN.findall(words.lower())
+
+
+# Model training and output generation
+
+# Read, tokenize, and count a single input file, returning its unigram,
+# bigram, and trigram counts (or None if the file could not be read).
+#
+# This runs in a worker process, so it returns plain counters for the main
+# process to merge rather than touching a shared model.
+def _count_file(file_and_skip):
+    content = _read_file(file_and_skip)
+    if content is None:
+        return None # Signal failure. Error message is already printed.
+
+    model = TrigramModel()
+    model.ingest(_tokenize(content))
+
+    return model.uni_cnt, model.bi_cnt, model.tri_cnt
+
+# Parse the input files into words and train a model on them.
+def _build_model():
+    model = TrigramModel()
+
+    # The input files are independent until the final merge, so each one is
+    # read, tokenized, and counted in its own process in parallel.
+    with ProcessPoolExecutor(max_workers=len(_FILES)) as executor:
+        for counts in executor.map(_count_file, _FILES):
+            if counts is None:
+                return None # Signal failure. Error message is already printed.
+
+            model.merge_counts(*counts)
+
+    model.finish()
+    return model
+
+# Return a string of the specified number of words based on the model.
+# After the specified number of words, continue until a period is generated.
+def _generate_words(model, word_count, refresh_limit):
+    # Bind the per-word method once rather than re-resolving the attribute
+    # (and re-creating a bound-method object) on every loop iteration.
+    generate_word = model.output_generator(refresh_limit).generate_word
+
+    # Preallocate the output buffer so each word is stored with an index
+    # write instead of growing the list; the extra room covers the words
+    # generated past word_count while finishing the final sentence (with an
+    # append fallback if that sentence runs very long).
+    words = [None] * (word_count * 2)
+
+    count = 0
+    capitalize = True
+    new_word = None
+    while count < word_count or new_word != ".":
+        new_word = generate_word()
+
+        # If a period is produced, add it to the end of the previous word
+        # without a space, capitalize the next word, and do not increment the
+        # counter (do not count periods toward the word count).
+        if new_word == ".":
+            if count == 0: # Do not start with a period
+                continue
+
+            words[count - 1] += "."
+            capitalize = True
+        else:
+            new_word = new_word.capitalize() if capitalize \
+                       or new_word in _CAPITALIZE else new_word
+            if count < len(words):
+                words[count] = new_word
+            else:
+                words.append(new_word)
+            capitalize = False
+            count += 1
+
+    # Separate the words with spaces and return a string.
+    del words[count:] # Drop the unused tail of the buffer
+    return " ".join(words)
+
+
+# File printing
+
+def _print_file(text):
+    try:
+        with open(_OUTPUT_FILE, "w") as file:
+            file.write(text)
+    except OSError:
+        print(
+            f'The results could not be written to "{_OUTPUT_FILE}". Make sure '
+            'the program is run with sufficient permissions.'
+        )
+
+
+def main():
+    model = _build_model()
+    if model is None:
+        return -1 # Failure
+
+    # Generate output
+    _print_file(_generate_words(model, _WORD_COUNT, _REFRESH_LIMIT))
+
+if __name__ == "__main__":
+    main()